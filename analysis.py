@@ -48,7 +48,7 @@ def preprocess_base(df):
     df['date'] = pd.to_datetime(df['date'])
     df['month'] = df['date'].dt.to_period('M').astype(str)
     df['state'] = df['state'].str.strip().str.title()
-    df['district'] = df['district'].str.strip().str.title()
+    df['district'] = df['district'].str.strip() # Already canonical from the ETL district normalizer
     return df
 
 # ------------------------------------------------------------
@@ -59,7 +59,7 @@ def reshape_enrolment(df):
     df = preprocess_base(df)
 
     df_long = df.melt(
-        id_vars=['date', 'month', 'state', 'district', 'pincode'],
+        id_vars=['date', 'month', 'state', 'district', 'district_code', 'pincode'],
         value_vars=['count_0_5', 'count_5_17', 'count_18_plus'],
         var_name='age_group',
         value_name='count'
@@ -81,7 +81,7 @@ def reshape_updates(df):
     df = preprocess_base(df)
 
     df_long = df.melt(
-        id_vars=['date', 'month', 'state', 'district', 'pincode'],
+        id_vars=['date', 'month', 'state', 'district', 'district_code', 'pincode'],
         value_vars=['count_5_17', 'count_17'],
         var_name='age_group',
         value_name='count'
@@ -152,9 +152,10 @@ plt.show()
 # ------------------------------------------------------------
 
 heatmap_df = (
-    enrol_df.groupby(['district', 'month'])['count']
+    enrol_df.groupby(['district_code', 'district', 'month'])['count']
     .sum()
     .unstack(fill_value=0)
+    .droplevel('district_code')
 )
 
 plt.figure(figsize=(12,6))
@@ -185,12 +186,12 @@ plt.show()
 # 13. ANOMALY DETECTION (Z-SCORE METHOD)
 # ------------------------------------------------------------
 
-district_mean = enrol_df.groupby('district')['count'].mean()
-district_std  = enrol_df.groupby('district')['count'].std()
+district_mean = enrol_df.groupby('district_code')['count'].mean()
+district_std  = enrol_df.groupby('district_code')['count'].std()
 
 enrol_df['z_score'] = (
-    enrol_df['count'] - enrol_df['district'].map(district_mean)
-) / enrol_df['district'].map(district_std)
+    enrol_df['count'] - enrol_df['district_code'].map(district_mean)
+) / enrol_df['district_code'].map(district_std)
 
 anomalies = enrol_df[enrol_df['z_score'].abs() > 3]
 
@@ -204,16 +205,17 @@ print(anomalies[['month', 'district', 'count', 'z_score']].head())
 sli_df = pd.concat([enrol_df, demo_df, bio_df])
 
 sli = (
-    sli_df.groupby(['month', 'district'])['count']
+    sli_df.groupby(['month', 'district_code', 'district'])['count']
     .sum()
     .reset_index()
 )
 
 high_stress = (
-    sli.groupby('district')['count']
+    sli.groupby(['district_code', 'district'])['count']
     .mean()
     .sort_values(ascending=False)
     .head(10)
+    .droplevel('district_code')
 )
 
 plt.figure(figsize=(8,4))
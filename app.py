@@ -3,9 +3,12 @@ import pandas as pd
 import plotly.express as px
 import math
 import numpy as np
-from db_utils import get_main_data, get_paginated_data, get_total_rows, get_states, get_detailed_stats
-from forecasting import generate_forecast
-from metrics import calculate_sli_and_risk
+import os
+import tempfile
+import time
+from db_utils import (get_main_data, get_paginated_data, get_total_rows, get_states, export_filtered_data,
+                      get_data_version, get_precomputed_version, get_precomputed_risk,
+                      get_precomputed_top_critical, get_precomputed_entities, get_precomputed_forecast)
 
 # Professional UI Configuration
 st.set_page_config(page_title="Seva-Drishti | UIDAI Analytics", layout="wide")
@@ -44,6 +47,15 @@ with st.sidebar:
         st.cache_data.clear()
         st.rerun()
 
+# --- PRECOMPUTED RESULTS CHECK ---
+if page in ("Service Load Analysis", "ML Forecasting"):
+    precomputed_version = get_precomputed_version()
+    if precomputed_version is None:
+        st.error("No precomputed results found. Run `python precompute.py` after the ETL to generate them.")
+        st.stop()
+    if precomputed_version != get_data_version():
+        st.warning("Precomputed results are older than the loaded data. Re-run `python precompute.py` to refresh them.")
+
 # --- 1. EXECUTIVE OVERVIEW ---
 if page == "Executive Overview":
     st.markdown('<div class="main-header"><h1>Executive Overview</h1><p>Strategic Operations & National Service Trends</p></div>', unsafe_allow_html=True)
@@ -54,7 +66,7 @@ if page == "Executive Overview":
     k1, k2, k3, k4 = st.columns(4)
     with k1: st.markdown(f'<div class="metric-card"><h3>Total Services</h3><h2>{df_agg["total_count"].sum():,.0f}</h2></div>', unsafe_allow_html=True)
     with k2: st.markdown(f'<div class="metric-card"><h3>Monthly Avg</h3><h2>{df_agg.groupby("month")["total_count"].sum().mean():,.0f}</h2></div>', unsafe_allow_html=True)
-    with k3: st.markdown(f'<div class="metric-card"><h3>Active Districts</h3><h2>{df_agg["district"].nunique()}</h2></div>', unsafe_allow_html=True)
+    with k3: st.markdown(f'<div class="metric-card"><h3>Active Districts</h3><h2>{df_agg["district_code"].nunique()}</h2></div>', unsafe_allow_html=True)
     with k4: st.markdown(f'<div class="metric-card"><h3>Active States</h3><h2>{df_agg["state"].nunique()}</h2></div>', unsafe_allow_html=True)
 
     st.markdown("### 📈 National Volume Trend")
@@ -68,15 +80,8 @@ elif page == "Service Load Analysis":
     st.title("🛡️ Risk & Service Load Command Center")
     st.markdown("Weighted analysis of district-level operational stress.")
     
-    # Fetch data for risk calculation
-    df_detail = get_detailed_stats()
-    
-    # Prepare inputs for the metrics module
-    e_df = df_detail[['district', 'month', 'enrolment_count']].rename(columns={'enrolment_count': 'count'})
-    d_df = df_detail[['district', 'month', 'demographic_count']].rename(columns={'demographic_count': 'count'})
-    b_df = df_detail[['district', 'month', 'biometric_count']].rename(columns={'biometric_count': 'count'})
-    
-    risk_df = calculate_sli_and_risk(e_df, d_df, b_df)
+    # Risk scores are materialized by precompute.py; the page only reads them
+    risk_df = get_precomputed_risk(precomputed_version)
     
     # Filters
     c1, c2 = st.columns([1, 3])
@@ -90,20 +95,28 @@ elif page == "Service Load Analysis":
                          color_discrete_map={"Critical": "#d32f2f", "High": "#f57c00", "Normal": "#388e3c"})
         st.plotly_chart(fig, use_container_width=True)
     
+    st.markdown("#### 🚨 Top Critical Districts (Latest Month)")
+    st.dataframe(get_precomputed_top_critical(precomputed_version), use_container_width=True, hide_index=True)
+    
     st.markdown("#### District Stress Rankings")
     st.dataframe(filtered_risk.sort_values("risk_score", ascending=False), use_container_width=True, hide_index=True)
 
 # --- 3. ML FORECASTING ---
 elif page == "ML Forecasting":
     st.title("📊 Predictive Service Analytics")
-    df_detail = get_detailed_stats()
     
     c1, c2 = st.columns([1, 2])
     with c1:
         metric = st.selectbox("Select Target Metric", ["enrolment_count", "demographic_count", "biometric_count"])
         horizon = st.slider("Forecast Horizon (Months)", 3, 12, 6)
+        scope = st.radio("Scope", ["National", "State", "District"], horizontal=True)
+        entity = "All"
+        if scope != "National":
+            entities = get_precomputed_entities(precomputed_version, scope)
+            names = dict(zip(entities['entity'], entities['entity_name']))
+            entity = st.selectbox(f"Select {scope}", list(names), format_func=names.get)
     
-    forecast_df, growth = generate_forecast(df_detail, metric, horizon)
+    forecast_df, growth = get_precomputed_forecast(precomputed_version, metric, horizon, scope, entity)
     
     if forecast_df is not None:
         fig = px.line(forecast_df, x="month", y=metric, color="type", markers=True,
@@ -132,4 +145,79 @@ elif page == "Data Explorer":
     df_page = get_paginated_data(table, curr_page, PAGE_SIZE, search_term, state_filter)
     
     st.dataframe(df_page, use_container_width=True, hide_index=True)
-    st.caption(f"Showing {len(df_page)} of {total_rows} total records.")
\ No newline at end of file
+    st.caption(f"Showing {len(df_page)} of {total_rows} total records.")
+
+    # Full export of the current filter (streamed server-side, constant memory)
+    # Files are written under ./static and served by Streamlit's static file handler, which streams
+    # them from disk. That handler has no session check (anyone holding the random URL can fetch the
+    # file) and refuses files above 200 MB, so exports are short-lived and the limits are shown in the UI.
+    EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "exports")
+    EXPORT_MAX_BYTES = 200 * 1024 * 1024
+    EXPORT_TTL_SECONDS = 15 * 60
+    export_key = (table, state_filter, search_term)
+
+    def discard_export():
+        old = st.session_state.pop("export_file", None)
+        if old and os.path.exists(old["path"]):
+            os.remove(old["path"])
+
+    # Sweep exports not written to for EXPORT_TTL_SECONDS, including those of sessions that have ended
+    if os.path.isdir(EXPORT_DIR):
+        for name in os.listdir(EXPORT_DIR):
+            path = os.path.join(EXPORT_DIR, name)
+            if time.time() - os.path.getmtime(path) > EXPORT_TTL_SECONDS:
+                os.remove(path)
+
+    # A download for a different dataset/filter would be mislabelled, so drop it
+    if st.session_state.get("export_file", {}).get("key", export_key) != export_key:
+        discard_export()
+
+    # A run that never reached the end of the export was interrupted by a rerun (e.g. Cancel Export)
+    if st.session_state.pop("export_running", False):
+        st.warning("Export cancelled.")
+
+    st.markdown("#### ⬇️ Export Filtered Records")
+    st.caption(f"Exports up to 200 MB can be downloaded in the browser (Parquet is much smaller than CSV). "
+               f"Download links are not tied to your login and expire after {EXPORT_TTL_SECONDS // 60} minutes.")
+    e1, e2, e3 = st.columns([1, 1, 1])
+    with e1: export_fmt = st.radio("Format", ["csv", "parquet"], horizontal=True)
+    with e2: start_export = st.button("Start Export")
+    with e3: st.button("Cancel Export") # Any click reruns the script, which interrupts a running export
+
+    if start_export:
+        discard_export()
+        progress = st.progress(0.0, text="Exporting...")
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        fd, out_path = tempfile.mkstemp(prefix=f"{table}_", suffix=f".{export_fmt}", dir=EXPORT_DIR)
+        os.close(fd)
+
+        def report(rows_written):
+            progress.progress(min(rows_written / max(total_rows, 1), 1.0),
+                              text=f"Exported {rows_written:,} of {total_rows:,} records")
+
+        st.session_state["export_running"] = True
+        try:
+            written = export_filtered_data(table, out_path, export_fmt, search_term, state_filter, on_progress=report)
+        except Exception as e:
+            # Rerun interrupts derive from BaseException and still pass through as a cancel
+            st.session_state["export_running"] = False
+            st.error(f"Export failed: {e}")
+        else:
+            st.session_state["export_running"] = False
+            st.session_state["export_file"] = {"key": export_key, "path": out_path, "fmt": export_fmt, "rows": written}
+
+    export = st.session_state.get("export_file")
+    if export and not os.path.exists(export["path"]):
+        st.session_state.pop("export_file")
+        st.info("The previous export has expired. Start a new export to download it again.")
+    elif export:
+        file_name = f"{export['key'][0]}_export.{export['fmt']}"
+        if os.path.getsize(export["path"]) > EXPORT_MAX_BYTES:
+            os.remove(export["path"])
+            st.session_state.pop("export_file")
+            st.warning(f"Export of {export['rows']:,} records exceeds the 200 MB browser download limit and was discarded. "
+                       f"Narrow the State/District filter or choose Parquet and export again.")
+        else:
+            url = f"app/static/exports/{os.path.basename(export['path'])}"
+            st.markdown(f'<a href="{url}" download="{file_name}">📥 Download {export["rows"]:,} records '
+                        f'({export["fmt"].upper()})</a>', unsafe_allow_html=True)
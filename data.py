@@ -4,7 +4,8 @@ import glob
 import os
 import sys
 import re
-from thefuzz import process # pip install thefuzz
+import json
+from thefuzz import process, fuzz # pip install thefuzz
 
 # ==========================================
 # 1. DATABASE CONFIG
@@ -18,6 +19,8 @@ DB_CONFIG = {
 }
 DB_NAME = "aadhaar_db"
 DATA_DIR = "Data"
+DISTRICT_CACHE_FILE = "district_cache.json" # Persists resolved districts + stable codes across ETL runs
+DISTRICT_CACHE_VERSION = 2 # Bump to discard cached resolutions that can no longer be trusted
 
 # ==========================================
 # 2. THE GOLDEN MASTER LIST
@@ -80,7 +83,190 @@ def normalize_state_name(input_name):
     return input_name.title()
 
 # ==========================================
-# 4. DATABASE SETUP
+# 4. DISTRICT NORMALIZER (STATE-SCOPED)
+# ==========================================
+
+# Canonical spellings for districts that show up under several spellings in the source data.
+# Seeded into the master index before any file is read, so the canonical form never depends
+# on which file (or row) came first. Extend when a new variant group appears; unseeded names
+# are never cached, so the next ETL run picks the new seed up.
+OFFICIAL_DISTRICTS = {
+    "Andhra Pradesh": ["Anantapur", "Karimnagar", "Mahabubnagar"],
+    "Bihar": ["Aurangabad", "Samastipur", "Sheikhpura"],
+    "Chhattisgarh": ["Janjgir-Champa", "Mohla-Manpur-Ambagarh Chouki"],
+    "Gujarat": ["Banas Kantha", "Panch Mahals", "Sabar Kantha", "Surendranagar"],
+    "Haryana": ["Gurugram", "Nuh", "Yamunanagar"],
+    "Jharkhand": ["Hazaribagh", "Pakur", "Palamu"],
+    "Karnataka": ["Chamarajanagar", "Davanagere", "Hassan"],
+    "Kerala": ["Kasaragod"],
+    "Madhya Pradesh": ["Harda"],
+    "Maharashtra": ["Buldhana", "Gondia", "Chhatrapati Sambhajinagar", "Dharashiv"],
+    "Mizoram": ["Mamit"],
+    "Odisha": ["Angul", "Balasore", "Jagatsinghapur", "Jajpur", "Khordha", "Sundargarh"],
+    "Punjab": ["SAS Nagar (Mohali)"],
+    "Rajasthan": ["Jalore", "Jhunjhunu"],
+    "Tamil Nadu": ["Kanniyakumari", "Tiruvallur", "Tirupathur", "Viluppuram"],
+    "Telangana": ["Medchal-Malkajgiri", "Ranga Reddy", "Sangareddy"],
+    "Uttar Pradesh": ["Bara Banki", "Bulandshahr", "Maharajganj"],
+    "Uttarakhand": ["Haridwar"],
+    "West Bengal": ["Hugli", "Maldah", "North 24 Parganas", "Purulia", "South 24 Parganas"],
+}
+
+# Renamed / commonly misspelt districts, keyed by cleaned name within a state.
+# Checked before the persistent cache, so an alias also overrides an earlier bad resolution.
+DISTRICT_ALIASES = {
+    "Andhra Pradesh": {"ananthapuramu": "Anantapur", "rangareddi": "Ranga Reddy", "rangareddy": "Ranga Reddy",
+                       "kv rangareddy": "Ranga Reddy", "kvrangareddy": "Ranga Reddy"},
+    "Bihar": {"purnea": "Purnia", "east champaran": "Purba Champaran", "west champaran": "Pashchim Champaran"},
+    "Delhi": {"north east": "North East Delhi"},
+    "Gujarat": {"ahmadabad": "Ahmedabad"},
+    "Haryana": {"gurgaon": "Gurugram", "mewat": "Nuh"},
+    "Himachal Pradesh": {"lahul and spiti": "Lahul & Spiti"},
+    "Jammu & Kashmir": {"badgam": "Budgam"},
+    "Jharkhand": {"kodarma": "Koderma", "sahebganj": "Sahibganj"},
+    "Uttar Pradesh": {"allahabad": "Prayagraj", "faizabad": "Ayodhya",
+                      "sant ravidas nagar": "Bhadohi", "sant ravidas nagar bhadohi": "Bhadohi"},
+    "Karnataka": {"bangalore": "Bengaluru Urban", "bangalore urban": "Bengaluru Urban",
+                  "bangalore rural": "Bengaluru Rural", "mysore": "Mysuru", "belgaum": "Belagavi",
+                  "gulbarga": "Kalaburagi", "bellary": "Ballari", "shimoga": "Shivamogga",
+                  "tumkur": "Tumakuru", "bijapur": "Vijayapura", "chikmagalur": "Chikkamagaluru",
+                  "chickmagalur": "Chikkamagaluru", "bengaluru": "Bengaluru Urban"},
+    "Madhya Pradesh": {"narsimhapur": "Narsinghpur"},
+    "Maharashtra": {"aurangabad": "Chhatrapati Sambhajinagar", "osmanabad": "Dharashiv",
+                    "ahmednagar": "Ahilyanagar", "ahmadnagar": "Ahilyanagar", "ahmed nagar": "Ahilyanagar",
+                    "bombay": "Mumbai", "mumbai sub urban": "Mumbai Suburban",
+                    "raigarh": "Raigad", "raigarhmh": "Raigad", "bid": "Beed"},
+    "Odisha": {"baleshwar": "Balasore", "jajapur": "Jajpur", "anugul": "Angul", "khorda": "Khordha",
+               "baudh": "Boudh"},
+    "Puducherry": {"pondicherry": "Puducherry"},
+    "Punjab": {"ferozepur": "Firozpur"},
+    "Rajasthan": {"chittaurgarh": "Chittorgarh", "dhaulpur": "Dholpur"},
+    "West Bengal": {"burdwan": "Purba Bardhaman", "north twenty four parganas": "North 24 Parganas",
+                    "south twenty four parganas": "South 24 Parganas", "hooghly": "Hugli",
+                    "darjiling": "Darjeeling", "hawrah": "Howrah", "haora": "Howrah", "hooghiy": "Hugli",
+                    "koch bihar": "Cooch Behar", "south dinajpur": "Dakshin Dinajpur",
+                    "north dinajpur": "Uttar Dinajpur",
+                    "east midnapore": "Purba Medinipur", "west midnapore": "Paschim Medinipur"},
+    "Sikkim": {"east": "East Sikkim", "west": "West Sikkim", "north": "North Sikkim", "south": "South Sikkim"},
+    "Tamil Nadu": {"tuticorin": "Thoothukudi", "kanchipuram": "Kancheepuram", "trichy": "Tiruchirappalli"},
+    "Telangana": {"rangareddi": "Ranga Reddy", "rangareddy": "Ranga Reddy", "kv rangareddy": "Ranga Reddy",
+                  "kvrangareddy": "Ranga Reddy", "jangoan": "Jangaon"},
+}
+
+# Tokens that distinguish sibling districts ("North Goa" vs "South Goa"); fuzzy matches must agree on them
+DISTRICT_QUALIFIERS = {"north", "south", "east", "west", "central", "upper", "lower",
+                       "urban", "rural", "purba", "paschim", "pashchim", "uttar", "dakshin"}
+QUALIFIER_SYNONYMS = {"purba": "east", "paschim": "west", "pashchim": "west", "uttar": "north", "dakshin": "south"}
+
+def clean_district_key(name):
+    clean = str(name).lower().strip()
+    clean = re.sub(r'[^\w\s&]', '', clean) # Remove punctuation except &
+    clean = re.sub(r'\s+', ' ', clean).strip()
+    return clean
+
+def tidy_district_label(raw):
+    """Display form for a district with no known canonical name: drops source markers like 'Harda *'."""
+    label = re.sub(r'[*#]', '', raw)
+    label = re.sub(r'\s+', ' ', label).strip().rstrip('.').strip()
+    return label.title()
+
+def _qualifiers(clean):
+    # Hindi/Bengali qualifiers mean the same as their English forms ("Dakshin Dinajpur" == "South Dinajpur")
+    return {QUALIFIER_SYNONYMS.get(tok, tok) for tok in clean.split() if tok in DISTRICT_QUALIFIERS or tok.isdigit()}
+
+def _is_safe_fuzzy_match(clean, candidate):
+    # Spelling variants keep their first letter, length and qualifiers ("Rangareddy" != "Sangareddy")
+    return (clean[0] == candidate[0]
+            and abs(len(clean) - len(candidate)) <= 3
+            and _qualifiers(clean) == _qualifiers(candidate))
+
+def _authoritative_names(state):
+    return set(OFFICIAL_DISTRICTS.get(state, [])) | set(DISTRICT_ALIASES.get(state, {}).values())
+
+def load_district_index():
+    """
+    Builds the in-memory master index from the seed list and the persistent cache:
+      master[state][clean_key] -> canonical name (seeds, alias targets, districts first seen this run)
+      resolved["state|raw"]    -> canonical name for alias / exact-seed hits (persisted)
+      run["state|raw"]         -> canonical name for fuzzy matches and unseeded districts (never persisted,
+                                  so a seed or alias added later takes effect on the next ETL)
+      codes["state|canonical"] -> stable integer district code (persisted, never renumbered)
+      used                     -> codes referenced by rows in this run
+    """
+    index = {"master": {}, "resolved": {}, "run": {}, "codes": {}, "used": set()}
+    if os.path.exists(DISTRICT_CACHE_FILE):
+        with open(DISTRICT_CACHE_FILE, encoding="utf-8") as f:
+            cached = json.load(f)
+        index["codes"] = cached.get("codes", {})
+        # Older caches also stored first-seen spellings; only trust current-format entries that
+        # still point at a seeded or aliased name
+        if cached.get("version") == DISTRICT_CACHE_VERSION:
+            index["resolved"] = {key: canonical for key, canonical in cached.get("resolved", {}).items()
+                                 if canonical in _authoritative_names(key.split("|", 1)[0])}
+    for state in set(OFFICIAL_DISTRICTS) | set(DISTRICT_ALIASES):
+        for canonical in _authoritative_names(state):
+            index["master"].setdefault(state, {})[clean_district_key(canonical)] = canonical
+    return index
+
+def save_district_index(index):
+    with open(DISTRICT_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": DISTRICT_CACHE_VERSION, "resolved": index["resolved"], "codes": index["codes"]},
+                  f, indent=1, ensure_ascii=False)
+
+def normalize_district_name(state, input_name, index):
+    """Resolves a raw district string to its canonical name within an (already normalized) state."""
+    raw = "" if pd.isna(input_name) else str(input_name)
+    cache_key = f"{state}|{raw}"
+
+    # LAYER 1: Aggressive Cleaning
+    clean = clean_district_key(raw)
+    state_master = index["master"].setdefault(state, {})
+
+    # LAYER 2: Semantic Alias Mapping (renamed districts) - always authoritative
+    if clean in DISTRICT_ALIASES.get(state, {}):
+        canonical = DISTRICT_ALIASES[state][clean]
+        index["resolved"][cache_key] = canonical
+        return canonical
+
+    # LAYER 3: Previously resolved spellings
+    if cache_key in index["resolved"]:
+        return index["resolved"][cache_key]
+    if cache_key in index["run"]:
+        return index["run"][cache_key]
+
+    if clean == "":
+        canonical = "Unknown"
+    # LAYER 4: Exact hit in the state's master index
+    elif clean in state_master:
+        canonical = state_master[clean]
+        if canonical in _authoritative_names(state):
+            index["resolved"][cache_key] = canonical
+            return canonical
+    else:
+        canonical = None
+        # LAYER 5: Fuzzy Logic, only against districts of the same state
+        if state_master:
+            match, score = process.extractOne(clean, list(state_master), scorer=fuzz.ratio)
+            if score >= 90 and _is_safe_fuzzy_match(clean, match):
+                canonical = state_master[match]
+        # New district: its tidied spelling becomes the canonical form for this run
+        if canonical is None:
+            canonical = tidy_district_label(raw)
+            state_master.setdefault(clean_district_key(canonical), canonical)
+
+    index["run"][cache_key] = canonical
+    return canonical
+
+def get_district_code(state, canonical, index):
+    """Assigns stable integer codes; existing codes are never renumbered."""
+    key = f"{state}|{canonical}"
+    if key not in index["codes"]:
+        index["codes"][key] = max(index["codes"].values(), default=0) + 1
+    index["used"].add(key)
+    return index["codes"][key]
+
+# ==========================================
+# 5. DATABASE SETUP
 # ==========================================
 
 def get_connection(db=None):
@@ -109,21 +295,32 @@ def setup_db():
                 date DATE,
                 state VARCHAR(100),
                 district VARCHAR(100),
+                district_code INT,
                 pincode VARCHAR(10),
-                {cols}
+                {cols},
+                KEY idx_district_date (district_code, date)
             )
         """)
+    
+    cursor.execute("""
+        CREATE TABLE district_master (
+            district_code INT PRIMARY KEY,
+            state VARCHAR(100),
+            district VARCHAR(100)
+        )
+    """)
     conn.commit()
     return conn
 
 # ==========================================
-# 5. ETL PIPELINE
+# 6. ETL PIPELINE
 # ==========================================
 
 def process_data():
     conn = setup_db()
     cursor = conn.cursor()
     print(" Starting Zero-Touch ETL Pipeline...")
+    district_index = load_district_index()
 
     # Folder Config
     tasks = [
@@ -141,7 +338,7 @@ def process_data():
     ]
 
     for folder, table, rename_map, value_cols in tasks:
-        files = glob.glob(os.path.join(DATA_DIR, folder, "*.csv"))
+        files = sorted(glob.glob(os.path.join(DATA_DIR, folder, "*.csv")))
         print(f"\n Processing {folder} ({len(files)} files)")
         
         for f in files:
@@ -158,11 +355,19 @@ def process_data():
             # We apply the normalizer to every single row
             df["state"] = df["state"].apply(normalize_state_name)
             
-            # 4. Filter & Order
-            cols = ["date", "state", "district", "pincode"] + value_cols
+            # 4. STATE-SCOPED DISTRICT CORRECTION
+            # Each distinct (state, raw district) pair is resolved once, then mapped back onto the rows
+            pairs = df[["state", "district"]].drop_duplicates()
+            pairs["canonical"] = [normalize_district_name(st, d, district_index) for st, d in zip(pairs["state"], pairs["district"])]
+            pairs["district_code"] = [get_district_code(st, c, district_index) for st, c in zip(pairs["state"], pairs["canonical"])]
+            df = df.merge(pairs, on=["state", "district"], how="left")
+            df["district"] = df.pop("canonical")
+            
+            # 5. Filter & Order
+            cols = ["date", "state", "district", "district_code", "pincode"] + value_cols
             df = df[cols].fillna(0) # Safety fill for numbers
             
-            # 5. Bulk Insert
+            # 6. Bulk Insert
             placeholders = ",".join(["%s"] * len(cols))
             query = f"INSERT INTO {table} ({','.join(cols)}) VALUES ({placeholders})"
             cursor.executemany(query, df.values.tolist())
@@ -170,6 +375,14 @@ def process_data():
             
             print(f"   {os.path.basename(f)} -> Cleaned & Inserted {len(df)} rows")
 
+    # District master table + persistent cache for the next run
+    # Only codes this load refers to; retired canonical names keep their code in the cache but not here
+    master_rows = [(district_index["codes"][key], *key.split("|", 1)) for key in sorted(district_index["used"])]
+    cursor.executemany("INSERT INTO district_master (district_code, state, district) VALUES (%s, %s, %s)", master_rows)
+    conn.commit()
+    save_district_index(district_index)
+    print(f"\n District master: {len(master_rows)} canonical districts")
+
     print("\n ETL Complete! Database is 100% Normalized.")
     conn.close()
 
@@ -6,6 +6,10 @@ from sklearn.linear_model import LinearRegression
 @st.cache_data
 def generate_forecast(df, target_col, months_to_predict=6):
     """Predicts future service load using Linear Regression."""
+    return build_forecast(df, target_col, months_to_predict)
+
+def build_forecast(df, target_col, months_to_predict=6):
+    """Uncached forecast core, safe to call from worker processes."""
     if df.empty or len(df) < 3:
         return None, 0
 
@@ -39,6 +43,10 @@ def generate_forecast(df, target_col, months_to_predict=6):
     history_df["type"] = "History"
     
     full_df = pd.concat([history_df, forecast_df]).reset_index(drop=True)
-    growth = ((prediction[-1] - y.iloc[-1]) / y.iloc[-1] * 100) if y.iloc[-1] != 0 else 0
+    growth = calculate_growth(y.iloc[-1], prediction[-1])
     
-    return full_df, growth
\ No newline at end of file
+    return full_df, growth
+
+def calculate_growth(last_actual, predicted):
+    """Percentage change from the last observed month to a predicted month."""
+    return ((predicted - last_actual) / last_actual * 100) if last_actual != 0 else 0
@@ -6,18 +6,27 @@ def calculate_sli_and_risk(enrol_df, demo_df, bio_df):
     """
     Calculates Service Load Intensity (SLI) and Risk Scores for each district.
     Input DFs must have 'district', 'month', and 'count' columns.
+    If 'district_code' is present, aggregation and merging run on the integer code
+    and the district name is attached afterwards.
     """
+    key = 'district_code' if 'district_code' in enrol_df.columns else 'district'
+
     # 1. Aggregate by District & Month
     # We rename 'count' to specific types to avoid confusion after merging
-    e_agg = enrol_df.groupby(['district', 'month'])['count'].sum().reset_index().rename(columns={'count': 'enrol_count'})
-    d_agg = demo_df.groupby(['district', 'month'])['count'].sum().reset_index().rename(columns={'count': 'demo_count'})
-    b_agg = bio_df.groupby(['district', 'month'])['count'].sum().reset_index().rename(columns={'count': 'bio_count'})
+    e_agg = enrol_df.groupby([key, 'month'])['count'].sum().reset_index().rename(columns={'count': 'enrol_count'})
+    d_agg = demo_df.groupby([key, 'month'])['count'].sum().reset_index().rename(columns={'count': 'demo_count'})
+    b_agg = bio_df.groupby([key, 'month'])['count'].sum().reset_index().rename(columns={'count': 'bio_count'})
 
     # 2. Merge all datasets (Outer join ensures we don't lose districts active in only one service)
-    merged = e_agg.merge(d_agg, on=['district', 'month'], how='outer') \
-                  .merge(b_agg, on=['district', 'month'], how='outer') \
+    merged = e_agg.merge(d_agg, on=[key, 'month'], how='outer') \
+                  .merge(b_agg, on=[key, 'month'], how='outer') \
                   .fillna(0)
 
+    if key == 'district_code':
+        names = pd.concat([df[['district_code', 'district']] for df in (enrol_df, demo_df, bio_df)]) \
+                  .drop_duplicates('district_code')
+        merged = merged.merge(names, on='district_code', how='left')
+
     # 3. Calculate Service Load Intensity (SLI) - Weighted Effort
     # Weights: Biometric (1.5) > Enrolment (1.0) > Demographic (0.8)
     merged['sli_score'] = (merged['enrol_count'] * 1.0) + \
@@ -48,4 +57,8 @@ def calculate_sli_and_risk(enrol_df, demo_df, bio_df):
 def get_top_critical_districts(sli_df):
     """
     Returns the top 10 most critical districts based on the most recent month's data.
-    """
\ No newline at end of file
+    """
+    if sli_df.empty:
+        return sli_df
+    latest = sli_df[sli_df['month'] == sli_df['month'].max()]
+    return latest.sort_values('risk_score', ascending=False).head(10).reset_index(drop=True)
\ No newline at end of file
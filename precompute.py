@@ -0,0 +1,145 @@
+import argparse
+import os
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+import pandas as pd
+from sqlalchemy import text
+
+from db_utils import engine, fetch_detailed_stats, get_data_version
+from forecasting import build_forecast, calculate_growth
+from metrics import calculate_sli_and_risk, get_top_critical_districts
+
+# ==========================================
+# 1. JOB CONFIG
+# ==========================================
+
+METRICS = ["enrolment_count", "demographic_count", "biometric_count"]
+HORIZONS = range(3, 13)  # Matches the dashboard's forecast horizon slider
+
+# ==========================================
+# 2. RISK SCORES
+# ==========================================
+
+def compute_risk(df_detail):
+    """Runs the same SLI/risk calculation the Service Load page used to run live."""
+    e_df = df_detail[['district_code', 'district', 'month', 'enrolment_count']].rename(columns={'enrolment_count': 'count'})
+    d_df = df_detail[['district_code', 'district', 'month', 'demographic_count']].rename(columns={'demographic_count': 'count'})
+    b_df = df_detail[['district_code', 'district', 'month', 'biometric_count']].rename(columns={'biometric_count': 'count'})
+    risk_df = calculate_sli_and_risk(e_df, d_df, b_df)
+    return risk_df, get_top_critical_districts(risk_df)
+
+# ==========================================
+# 3. FORECASTS (one worker task per entity)
+# ==========================================
+
+def forecast_entity(task):
+    """Forecasts every metric for a single National/State/District slice."""
+    entity_type, entity, entity_name, df = task
+    series_rows, growth_rows = [], []
+    for metric in METRICS:
+        # One fit at the longest horizon; every shorter horizon is a prefix of the same prediction
+        forecast_df, _ = build_forecast(df, metric, max(HORIZONS))
+        if forecast_df is None:
+            continue
+        last_actual = forecast_df.loc[forecast_df['type'] == 'History', metric].iloc[-1]
+        predicted = forecast_df.loc[forecast_df['type'] == 'Forecast', metric].to_numpy()
+        for horizon in HORIZONS:
+            growth_rows.append({'entity_type': entity_type, 'entity': entity, 'entity_name': entity_name,
+                                'metric': metric, 'horizon': horizon,
+                                'growth': float(calculate_growth(last_actual, predicted[horizon - 1]))})
+        forecast_df = forecast_df.rename(columns={metric: 'value'})
+        forecast_df['entity_type'] = entity_type
+        forecast_df['entity'] = entity
+        forecast_df['metric'] = metric
+        series_rows.append(forecast_df)
+    return series_rows, growth_rows
+
+def build_tasks(df_detail):
+    # State and district forecasts back the scope selector on the ML Forecasting page
+    tasks = [("National", "All", "All India", df_detail)]
+    tasks += [("State", state, state, grp) for state, grp in df_detail.groupby('state')]
+    tasks += [("District", str(code), f"{grp['district'].iloc[0]} ({grp['state'].iloc[0]})", grp)
+              for code, grp in df_detail.groupby('district_code')]
+    return tasks
+
+def compute_forecasts(df_detail, workers):
+    tasks = build_tasks(df_detail)
+    with Pool(processes=workers) as pool:
+        results = pool.map(forecast_entity, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+
+    series = [frame for frame_list, _ in results for frame in frame_list]
+    growth = [row for _, row_list in results for row in row_list]
+    series_df = pd.concat(series, ignore_index=True) if series else pd.DataFrame()
+    return series_df, pd.DataFrame(growth)
+
+# ==========================================
+# 4. PERSIST RESULTS
+# ==========================================
+
+def write_results(results, data_version):
+    """
+    Writes each result into a staging table, then swaps all of them and the run log in with
+    a single RENAME TABLE. MySQL DDL commits implicitly, so this swap (atomic across tables)
+    is what keeps readers from seeing missing or half-written results.
+    """
+    tables = list(results) + ["precompute_runs"]
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS precompute_runs (
+                data_version VARCHAR(20),
+                computed_at DATETIME
+            )
+        """))
+        for table, df in results.items():
+            df = df.copy()
+            df['data_version'] = data_version
+            df.to_sql(f"{table}_staging", conn, if_exists="replace", index=False, chunksize=10000)
+            # First run: give RENAME something to swap out
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table} LIKE {table}_staging"))
+
+        conn.execute(text("DROP TABLE IF EXISTS precompute_runs_staging"))
+        conn.execute(text("CREATE TABLE precompute_runs_staging LIKE precompute_runs"))
+        conn.execute(text("INSERT INTO precompute_runs_staging SELECT * FROM precompute_runs"))
+        conn.execute(text("INSERT INTO precompute_runs_staging VALUES (:version, :ts)"),
+                     {'version': data_version, 'ts': datetime.now()})
+        conn.commit()
+
+        conn.execute(text("DROP TABLE IF EXISTS " + ", ".join(f"{t}_old" for t in tables)))
+        conn.execute(text("RENAME TABLE " + ", ".join(f"{t} TO {t}_old, {t}_staging TO {t}" for t in tables)))
+        conn.execute(text("DROP TABLE " + ", ".join(f"{t}_old" for t in tables)))
+
+# ==========================================
+# 5. ENTRY POINT
+# ==========================================
+
+def run_precompute(workers=None):
+    start = time.time()
+    workers = workers or os.cpu_count() or 1
+    data_version = get_data_version()
+    print(f" Starting precompute job (data version {data_version}, {workers} workers)...")
+
+    df_detail = fetch_detailed_stats()
+    print(f"   Loaded {len(df_detail)} district-month rows")
+
+    risk_df, top_critical = compute_risk(df_detail)
+    print(f"   Risk scores computed for {risk_df['district_code'].nunique()} districts")
+
+    series_df, growth_df = compute_forecasts(df_detail, workers)
+    print(f"   Forecasts computed for {len(growth_df)} entity/metric/horizon combinations")
+
+    write_results({
+        "risk_scores": risk_df,
+        "top_critical_districts": top_critical,
+        "forecast_results": series_df,
+        "forecast_growth": growth_df,
+    }, data_version)
+
+    print(f"\n Precompute Complete in {time.time() - start:.1f}s!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize risk scores and forecasts for the dashboard.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+    run_precompute(args.workers)